@@ -13,6 +13,12 @@
 Módulo de configuración de la aplicación recepy
 """
 
+import re
+import sys
+from functools import lru_cache
+from types import MappingProxyType
+from urllib.parse import urlsplit
+
 __author__ = 'Alejandro Naifuino (alenaifuino@gmail.com)'
 __copyright__ = 'Copyright (C) 2017 Alejandro Naifuino'
 __license__ = 'GPL 3.0'
@@ -60,5 +66,87 @@ CONFIG = {
     }
 }
 
+# Expresión regular que valida que una URL tenga esquema y host
+URL_RE = re.compile(r'\A[a-z][a-z0-9+.\-]*://[^/\s]+', re.IGNORECASE)
+
+
+def _freeze(data):
+    """
+    Devuelve una vista de sólo lectura del diccionario recibido y de sus
+    diccionarios anidados con las claves internadas
+    """
+    return MappingProxyType({
+        sys.intern(key): _freeze(value) if isinstance(value, dict) else value
+        for key, value in data.items()
+    })
+
+
+@lru_cache(maxsize=None)
+def validate_config():
+    """
+    Valida una única vez por proceso los valores estáticos de CONFIG. Se
+    invoca al obtener los datos de configuración para que los errores se
+    informen a través de ValueError
+    """
+    # Valida el DN
+    if not isinstance(CONFIG['dn'], str):
+        raise ValueError('Error de configuración en [dn]: no es válido')
+
+    # Valida la frase secreta que no es requerida si la clave privada no está
+    # encriptada
+    if CONFIG['passphrase'] is not None and \
+       not isinstance(CONFIG['passphrase'], str):
+        raise ValueError('Error de configuración en [passphrase]: no es '
+                         'válido')
+
+    # Valida los WSDL
+    urls = [('wsdl', url) for url in CONFIG['wsdl'].values()]
+    for wsdl in CONFIG['ws_wsdl'].values():
+        urls.extend(('ws_wsdl', url) for url in wsdl.values())
+    for value, url in urls:
+        if not isinstance(url, str) or not URL_RE.match(url):
+            raise ValueError('Error de configuración en [{}]: no es una URL '
+                             'válida'.format(value))
+
+
+# Congelo CONFIG para evitar modificaciones accidentales
+CONFIG = _freeze(CONFIG)
+
+# Diccionario plano de WSDL de los Web Services indexado por (servicio, modo)
+WS_WSDL_FLAT = {(service, mode): url
+                for service, wsdl in CONFIG['ws_wsdl'].items()
+                for mode, url in wsdl.items()}
+
+# URL de los WSDL parseadas una única vez al cargar la configuración
+CONFIG_PARSED = {
+    'wsdl': {mode: urlsplit(url) for mode, url in CONFIG['wsdl'].items()},
+    'ws_wsdl': {service: {mode: urlsplit(url) for mode, url in wsdl.items()}
+                for service, wsdl in CONFIG['ws_wsdl'].items()}
+}
+
+
+def get_wsdl_host(service, mode):
+    """
+    Devuelve el nombre de host del WSDL del Web Service según el modo de
+    conexión
+    """
+    return CONFIG_PARSED['ws_wsdl'][service][mode].hostname
+
+
+# Tablas del web service WS_SR_PADRON_A100
+A100_COLLECTIONS = tuple(sys.intern(name) for name in (
+    'SUPA.E_ORGANISMO_INFORMANTE', 'SUPA.TIPO_EMPRESA_JURIDICA',
+    'SUPA.E_PROVINCIA', 'SUPA.TIPO_DATO_ADICIONAL_DOMICILIO',
+    'PUC_PARAM.T_TIPO_LINEA_TELEFONICA', 'SUPA.TIPO_TELEFONO',
+    'SUPA.TIPO_COMPONENTE_SOCIEDAD', 'SUPA.TIPO_EMAIL', 'SUPA.TIPO_DOMICILIO',
+    'SUPA.E_ACTIVIDAD', 'PUC_PARAM.T_CALLE', 'PUC_PARAM.T_LOCALIDAD'))
+
 # Directorio donde se guardan los archivos del Web Service
 OUTPUT_DIR = 'data/'
+
+# Caché persistente de WSDL y XSD de los Web Services y su tiempo de vida en
+# segundos
+WSDL_CACHE = {
+    'path': '~/.cache/recepy/zeep.db',
+    'timeout': 86400
+}
@@ -18,13 +18,16 @@ Módulo con funciones auxiliares para la gestión de:
 """
 
 import collections.abc
-import logging
+import re
 import sys
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache, partial
+from operator import itemgetter
 
-from config.config import CONFIG, DEBUG
-
-from . import validation
+from config.config import (A100_COLLECTIONS, CONFIG, CONFIG_PARSED, DEBUG,
+                           WS_WSDL_FLAT, get_wsdl_host, validate_config)
 
 __author__ = "Alejandro Naifuino <alenaifuino@gmail.com>"
 __copyright__ = "Copyright (C) 2017 Alejandro Naifuino"
@@ -33,31 +36,66 @@ __version__ = "1.8.8"
 
 
 # Archivo de configuración
+# Claves de CONFIG cuyo valor depende del modo de conexión
+MODE_KEYS = ('certificate', 'wsdl')
+
+# Expresión regular que obtiene la CUIT del campo dn
+CUIT_RE = re.compile(r'CUIT\s*(\d{11})')
+
+# Obtiene los campos de configuración utilizados por get_config_data
+CONFIG_FIELDS = itemgetter('debug', 'prod', 'web_service')
+
+
 def get_config_data(args):
     """
     Obtengo los datos de configuración y devuelvo un diccionario con los mismos
     """
+    # Devuelvo una copia para que el llamador no modifique el resultado
+    # cacheado
+    return dict(build_config_data(tuple(sorted(args.items()))))
+
+
+@lru_cache(maxsize=32)
+def build_config_data(frozen_args):
+    """
+    Construye y valida el diccionario de configuración una única vez para
+    cada combinación de argumentos recibida como tupla de pares
+    """
+    from . import validation
+
+    # Valido los valores estáticos de configuración una única vez
+    validate_config()
+
+    args = dict(frozen_args)
+
     # Hago un merge entre las claves de configuración y los argumentos pasados
     # Args sobreescribe CONFIG
-    data = {**CONFIG, **args}
+    data = CONFIG.copy()
+    if args:
+        data.update(args)
+
+    # Obtengo los campos utilizados en una única llamada
+    debug, prod, web_service = CONFIG_FIELDS(data)
 
     # Actualizo debug
-    data['debug'] = data['debug'] or DEBUG
+    data['debug'] = debug or DEBUG
 
     # Actualizo prod
-    data['prod'] = data['prod'] or CONFIG['prod']
+    data['prod'] = prod = prod or CONFIG['prod']
 
     # Establezco el modo de conexión
-    mode = 'prod' if data['prod'] else 'test'
+    mode = 'prod' if prod else 'test'
 
-    # Actualizo el certificado según modo de conexión
-    data['certificate'] = data['certificate'][mode]
-
-    # Actualizo WSDL de autenticación según modo de conexión
-    data['wsdl'] = data['wsdl'][mode]
+    # Actualizo el certificado y el WSDL de autenticación según modo de
+    # conexión
+    for key in MODE_KEYS:
+        data[key] = data[key][mode]
 
     # Actualizo WSDL del Web Service seǵun modo de conexión
-    data['ws_wsdl'] = data['ws_wsdl'][data['web_service']][mode]
+    data['ws_wsdl'] = WS_WSDL_FLAT.get((web_service, mode))
+    if data['ws_wsdl'] is None:
+        raise ValueError('Error de configuración en [ws_wsdl]: no hay un '
+                         'WSDL definido para {}'.format(web_service))
 
     # Valido los datos del diccionario de configuración
     validation.check_config(data)
@@ -69,14 +107,15 @@ def get_cuit():
     """
     Devuelve la CUIT definida en el campo dn
     """
+    from . import validation
+
     # Inicializo cuit
     cuit = CONFIG['dn']
 
     # Obtengo la CUIT del elemento dn en CONFIG
-    for item in cuit.split(','):
-        if 'CUIT' in item:
-            cuit = item[-11:]
-            break
+    match = CUIT_RE.search(cuit)
+    if match:
+        cuit = match.group(1)
 
     # Devuelvo la CUIT si es válida
     try:
@@ -88,52 +127,100 @@ def get_cuit():
     return None
 
 
+# Logger del módulo inicializado en la primera llamada a get_logger
+_LOGGER = None
+
+
+def get_logger():
+    """
+    Devuelve el logger del módulo configurando el logging una única vez
+    """
+    global _LOGGER
+    if _LOGGER is None:
+        import logging
+
+        logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+        _LOGGER = logging.getLogger(__name__)
+
+    return _LOGGER
+
+
 def print_config(data):
     """
     Imprime los datos básicos de configuración
     """
-    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
-    logging.info('|============  Configuración  ============')
-    logging.info('| Certificado:   %s', data['certificate'])
-    logging.info('| Clave Privada: %s', data['private_key'])
-    logging.info('| Frase Secreta: %s', '****' if data['passphrase'] else None)
-    logging.info('| WSAA WSDL:     %s', data['wsdl'])
-    logging.info('| WS:            %s', data['web_service'])
-    logging.info('| WS WSDL:       %s', data['ws_wsdl'])
-    logging.info('|=================  ---  =================')
+    logger = get_logger()
+
+    logger.info('|============  Configuración  ============')
+    logger.info('| Certificado:   %s', data['certificate'])
+    logger.info('| Clave Privada: %s', data['private_key'])
+    logger.info('| Frase Secreta: %s', '****' if data['passphrase'] else None)
+    logger.info('| WSAA WSDL:     %s', data['wsdl'])
+    logger.info('| WS:            %s', data['web_service'])
+    logger.info('| WS WSDL:       %s', data['ws_wsdl'])
+    logger.info('|=================  ---  =================')
 
 
 # CLI
+# Web Services soportados en el orden en que se muestran en la ayuda
+WEB_SERVICES_ORDER = tuple(CONFIG['ws_wsdl'])
+
+# Conjunto de Web Services soportados para validar la pertenencia
+WEB_SERVICES = frozenset(WEB_SERVICES_ORDER)
+
+# Conjunto de tablas de WS_SR_PADRON_A100 para validar la pertenencia
+A100_TABLES = frozenset(A100_COLLECTIONS)
+
+# Tupla con los alcances (padrones) habilitados
+SCOPES = ('4', '5', '10', '100')
+
+# Tupla de tipos de comprobantes habilitados
+VOUCHERS = ('solicitar', 'consultar', 'informar_sin_movimiento',
+            'consultar_sin_movimiento', 'informar_comprobantes',
+            'ultimo_autorizado', 'cantidad_registros', 'consultar_comprobante')
+
+# Tupla de parámetros habilitados
+PARAMETERS = ('comprobante', 'concepto', 'documento', 'iva', 'monedas',
+              'opcional', 'tributos', 'puntos_venta', 'cotizacion',
+              'tipos_paises')
+
+# Listados de valores soportados que se muestran en la ayuda
+WEB_SERVICES_HELP = '\n- '.join(WEB_SERVICES_ORDER)
+A100_COLLECTIONS_HELP = '\n- '.join(A100_COLLECTIONS)
+SCOPES_HELP = '\n- '.join(SCOPES)
+VOUCHERS_HELP = '\n- '.join(VOUCHERS)
+PARAMETERS_HELP = '\n- '.join(PARAMETERS)
+
+
+# Traducciones al español de las cadenas de argparse
+_ARG_MESSAGES = {
+    'positional arguments': 'argumentos posicionales',
+    'optional arguments': 'argumentos opcionales',
+    'show this help message and exit': 'mostrar esta ayuda y salir',
+    'invalid %(type)s value: %(value)r': 'valor inválido: %(value)r',
+    'invalid choice: %(value)r (choose from %(choices)s)':
+        'valor inválido %(value)r. Opciones posibles: %(choices)s',
+    'usage: ': 'uso: ',
+    'the following arguments are required: %s':
+        'argumentos requeridos: %s',
+    'expected one argument': 'se espera un valor para el parámetro',
+    'expected at most one argument': 'se espera como máximo un argumento',
+    'expected at least one argument':
+        'se espera al menos un valor para el parámetro',
+    'one of the arguments %s is required':
+        'al menos uno de los siguientes argumentos %s es requerido',
+    'not allowed with argument %s': 'no permitido con el argumento %s'
+}
+
+
 def arg_gettext(message):
     """
     Traduce cadenas de argparse al español
     """
-    messages = {
-        'positional arguments': 'argumentos posicionales',
-        'optional arguments': 'argumentos opcionales',
-        'show this help message and exit': 'mostrar esta ayuda y salir',
-        'invalid %(type)s value: %(value)r': 'valor inválido: %(value)r',
-        'invalid choice: %(value)r (choose from %(choices)s)':
-            'valor inválido %(value)r. Opciones posibles: %(choices)s',
-        'usage: ': 'uso: ',
-        'the following arguments are required: %s':
-            'argumentos requeridos: %s',
-        'expected one argument': 'se espera un valor para el parámetro',
-        'expected at most one argument': 'se espera como máximo un argumento',
-        'expected at least one argument':
-            'se espera al menos un valor para el parámetro',
-        'one of the arguments %s is required':
-            'al menos uno de los siguientes argumentos %s es requerido',
-        'not allowed with argument %s': 'no permitido con el argumento %s'
-    }
-
-    if message in messages:
-        return messages[message]
-
-    return message
-
-
-def base_parser(version):
+    return _ARG_MESSAGES.get(message, message)
+
+
+def base_parser(version, prog):
     """
     Parser a ser utilizado como base para cada script
     """
@@ -141,11 +228,11 @@ def base_parser(version):
 
     # Creo el parser de la línea de comandos
     base = argparse.ArgumentParser(
-        formatter_class=argparse.RawTextHelpFormatter)
+        prog=prog, formatter_class=argparse.RawTextHelpFormatter)
 
     # Establezco los comandos soportados. prog es utilizado para definir el
-    # nombre del script que se está ejecutando por eso suprimo la salida de
-    # help
+    # nombre del script que se está ejecutando por eso lo establezco como
+    # valor por default en lugar de registrarlo como argumento
     base.add_argument(
         '--produccion',
         action='store_true',
@@ -160,11 +247,21 @@ def base_parser(version):
         action='version',
         version='%(prog)s ' + version,
         help='muestra la versión del programa y sale')
-    base.add_argument('--prog', default=base.prog, help=argparse.SUPPRESS)
+    base.set_defaults(prog=prog)
 
     return base
 
 
+def check_argument(parser, arg_type, name, value, choices=None):
+    """
+    Valida el valor de un argumento de la línea de comandos. Se utiliza con
+    functools.partial como type de los argumentos de argparse
+    """
+    from . import validation
+
+    return validation.check_cli(parser, arg_type, value, name, choices)
+
+
 def wsaa_parser(base):
     """
     Comandos específicos para el script wsaa.py
@@ -172,17 +269,14 @@ def wsaa_parser(base):
     # Establezco un grupo de argumentos requeridos
     required = base.add_argument_group('argumentos requeridos')
 
-    # Tupla con los Web Services soportados
-    web_services = tuple(ws for ws in CONFIG['ws_wsdl'])
-
     # Establezco los comandos requeridos
     required.add_argument(
         '--web-service',
-        type=lambda x: validation.check_cli(
-            base, type='list', value=x, name='web-service', list=web_services),
+        type=partial(check_argument, base, 'list', 'web-service',
+                     choices=WEB_SERVICES),
         required=True,
         help='web service para el que se solicita acceso. '
-             'Valores soportados:\n- ' + '\n- '.join(web_services),
+             'Valores soportados:\n- ' + WEB_SERVICES_HELP,
         metavar='')
 
     return base
@@ -198,45 +292,30 @@ def ws_sr_padron_parser(base):
     # Establezco el grupo de argumentos auto exclusivos
     exclusive = required.add_mutually_exclusive_group(required=True)
 
-    # Tupla con los alcances (padrones) habilitados
-    scope = ('4', '5', '10', '100')
-
-    # Tablas del web service WS_SR_PADRON_A100
-    a100_collections = ('SUPA.E_ORGANISMO_INFORMANTE',
-                        'SUPA.TIPO_EMPRESA_JURIDICA', 'SUPA.E_PROVINCIA',
-                        'SUPA.TIPO_DATO_ADICIONAL_DOMICILIO',
-                        'PUC_PARAM.T_TIPO_LINEA_TELEFONICA',
-                        'SUPA.TIPO_TELEFONO', 'SUPA.TIPO_COMPONENTE_SOCIEDAD',
-                        'SUPA.TIPO_EMAIL', 'SUPA.TIPO_DOMICILIO',
-                        'SUPA.E_ACTIVIDAD', 'PUC_PARAM.T_CALLE',
-                        'PUC_PARAM.T_LOCALIDAD')
-
     required.add_argument(
         '--cuit',
-        type=lambda x: validation.check_cli(
-            base, type='cuit', value=x, name='cuit'),
+        type=partial(check_argument, base, 'cuit', 'cuit'),
         required=True,
         help='CUIT que solicita el acceso al padrón de la AFIP')
     required.add_argument(
         '--alcance',
-        type=lambda x: validation.check_cli(
-            base, type='list', value=x, name='alcance', list=scope),
+        type=partial(check_argument, base, 'list', 'alcance',
+                     choices=SCOPES),
         required=True,
         help='padrón de AFIP a ser consultado. '
-             'Valores soportados:\n- ' + '\n- '.join(scope))
+             'Valores soportados:\n- ' + SCOPES_HELP)
     exclusive.add_argument(
         '--persona',
-        type=lambda x: validation.check_cli(
-            base, type='cuit', value=x, name='persona'),
+        type=partial(check_argument, base, 'cuit', 'persona'),
         help='CUIT a ser consultada en el padrón de la AFIP',
         metavar='')
     exclusive.add_argument(
         '--tabla',
-        type=lambda x: validation.check_cli(
-            base, type='list', value=x, name='tabla', list=a100_collections),
+        type=partial(check_argument, base, 'list', 'tabla',
+                     choices=A100_TABLES),
         help='tabla a ser consultada en el padrón de la AFIP '
              '(sólo válido con alcance = 100). '
-             'Valores soportados:\n- ' + '\n- '.join(a100_collections),
+             'Valores soportados:\n- ' + A100_COLLECTIONS_HELP,
         metavar='')
 
     return base
@@ -252,53 +331,74 @@ def wsfe_parser(base):
     # Establezco el grupo de argumentos auto exclusivos
     exclusive = required.add_mutually_exclusive_group(required=True)
 
-    # Tupla de tipos de comprobantes habilitados
-    voucher = ('solicitar', 'consultar', 'informar_sin_movimiento',
-               'consultar_sin_movimiento', 'informar_comprobantes',
-               'ultimo_autorizado', 'cantidad_registros',
-               'consultar_comprobante')
-
-    # Tupla de parámetros habilitados
-    parameter = ('comprobante', 'concepto', 'documento', 'iva', 'monedas',
-                 'opcional', 'tributos', 'puntos_venta', 'cotizacion',
-                 'tipos_paises')
-
     exclusive.add_argument(
         '--comprobante',
-        type=lambda x: validation.check_cli(
-            base, type='list', value=x, name='comprobante', list=voucher),
+        type=partial(check_argument, base, 'list', 'comprobante',
+                     choices=VOUCHERS),
         help='tipo de comprobante a ser autorizado. '
-             'Valores soportados:\n- ' + '\n- '.join(voucher),
+             'Valores soportados:\n- ' + VOUCHERS_HELP,
         metavar='')
     exclusive.add_argument(
         '--parametro',
-        type=lambda x: validation.check_cli(
-            base, type='list', value=x, name='parametro', list=parameter),
+        type=partial(check_argument, base, 'list', 'parametro',
+                     choices=PARAMETERS),
         help='parámetro a ser consultado en las tablas de AFIP. '
-             'Valores soportados:\n- ' + '\n- '.join(parameter),
+             'Valores soportados:\n- ' + PARAMETERS_HELP,
         metavar='')
 
     return base
 
 
+# Funciones que agregan los argumentos específicos de cada script
+PARSERS = {
+    'wsaa': wsaa_parser,
+    'ws_sr_padron': ws_sr_padron_parser,
+    'wsfe': wsfe_parser,
+}
+
+
+@lru_cache(maxsize=None)
+def script_parser(version, prog):
+    """
+    Construye una única vez por proceso el parser del script recibido. El
+    parser no se modifica al parsear la línea de comandos por lo que puede
+    ser reutilizado
+    """
+    # Obtengo el parser base con el nombre del script recibido
+    base = base_parser(version, prog)
+
+    # Llamo a la función del parser según el script que se está ejecutando
+    return PARSERS[prog[:-3]](base)
+
+
 def cli_parser(version):
     """
     Parsea la línea de comandos buscando argumentos requeridos y soportados
     """
+    # Devuelvo una copia para que el llamador no modifique el resultado
+    # cacheado
+    return dict(parse_argv(tuple(sys.argv), version))
+
+
+@lru_cache(maxsize=4)
+def parse_argv(argv, version):
+    """
+    Parsea una única vez cada línea de comandos recibida como tupla
+    """
     import gettext
+    import os
+
+    from . import validation
 
     # Obtengo las traducciones al español
     gettext.gettext = arg_gettext
 
-    # Obtengo el parser base
-    base = base_parser(version)
-
-    # Llamo a la función del parser según el script que se está ejecutando
-    parser = getattr(sys.modules[__name__], '%s_parser' % base.prog[:-3])(base)
+    # Obtengo el parser del script que se está ejecutando
+    parser = script_parser(version, os.path.basename(argv[0]))
 
     # Parseo la línea de comandos donde args son los parámetros conocidos y
     # extra el resto de los parámetros
-    args, extra = parser.parse_known_args()
+    args, extra = parser.parse_known_args(argv[1:])
 
     # Realizo las validaciones según el script que no puedo hacer via argparse
     try:
@@ -309,8 +409,8 @@ def cli_parser(version):
 
     # Si extra no es vacío incorporo los parámetros a la lista de argumentos
     if extra:
-        args.update({extra[i][2:]: extra[i + 1]
-                     for i in range(0, len(extra), 2)})
+        pairs = iter(extra)
+        args.update({key[2:]: value for key, value in zip(pairs, pairs)})
 
     # Incorporo el nombre del web service si este no está definido
     if 'web_service' not in args:
@@ -320,83 +420,137 @@ def cli_parser(version):
 
 
 # Fechas
+# Servidor de tiempo de AFIP utilizado por default
+NTP_SOURCE = 'afip.time.gob.ar'
+
+# Servidores de tiempo alternativos
+NTP_SERVERS = (
+    'ar.pool.ntp.org',
+    'south-america.pool.ntp.org',
+)
+
+# Caché del último timestamp obtenido de un servidor de tiempo junto con el
+# valor del reloj monotónico al momento de obtenerlo y su tiempo de vida
+_NTP_CACHE = {'ts': None, 'mono': 0.0, 'ttl': 900}
+
+# Cliente NTP compartido entre llamadas a ntp_time
+_NTP_CLIENT = None
+
+
 def ntp_time(ntp_server):
     """
     Devuelve timestamp de la fecha y hora obtenida del servidor de tiempo
     """
-    from ntplib import NTPClient, NTPException
-    from socket import gaierror
+    import queue
+
+    from ntplib import NTPClient
+
+    # Si el timestamp en caché está vigente lo devuelvo corregido por el
+    # tiempo transcurrido según el reloj monotónico
+    elapsed = time.monotonic() - _NTP_CACHE['mono']
+    if _NTP_CACHE['ts'] and elapsed < _NTP_CACHE['ttl']:
+        return _NTP_CACHE['ts'] + elapsed
+
+    # Genero el objeto NTPclient una única vez por proceso
+    global _NTP_CLIENT
+    if _NTP_CLIENT is None:
+        _NTP_CLIENT = NTPClient()
+    client = _NTP_CLIENT
+
+    # Consulto primero el servidor suministrado
+    timestamp = ntp_request(client, ntp_server) if ntp_server else None
+
+    # Si no obtuve respuesta consulto el resto de los servidores en paralelo
+    # en hilos daemon, para que las consultas pendientes no demoren la
+    # finalización del proceso, y me quedo con la primer respuesta obtenida
+    if timestamp is None:
+        results = queue.Queue()
+        for server in NTP_SERVERS:
+            threading.Thread(target=ntp_request,
+                             args=(client, server, results),
+                             daemon=True).start()
+        for _ in NTP_SERVERS:
+            timestamp = results.get()
+            if timestamp is not None:
+                break
+
+    # Actualizo la caché si obtuve respuesta de algún servidor
+    if timestamp:
+        _NTP_CACHE['ts'] = timestamp
+        _NTP_CACHE['mono'] = time.monotonic()
 
-    ntp_server_tuple = (
-        'ar.pool.ntp.org',
-        'south-america.pool.ntp.org',
-    )
+    return timestamp
 
-    # Genero el objeto NTPclient
-    client = NTPClient()
 
-    # Obtengo la fecha del ntp_server si este fue suministrado
-    if ntp_server:
-        try:
-            timestamp = client.request(ntp_server).tx_time
-        except (NTPException, gaierror):
-            timestamp = None
-    else:
+def ntp_request(client, server, results=None):
+    """
+    Resuelve el nombre del servidor de tiempo y lo consulta. Devuelve el
+    timestamp obtenido o None si el servidor no respondió y, si se suministra
+    results, lo agrega a la cola. Se ejecuta en el hilo de cada consulta para
+    que las resoluciones DNS también se hagan en paralelo
+    """
+    from ntplib import NTPException
+    from socket import gaierror
+
+    try:
+        timestamp = client.request(resolve_host(server), timeout=2).tx_time
+    except (NTPException, gaierror, OSError):
         timestamp = None
 
-    # Si no obtuve respuesta del ntp_server o hubo una excepción, recorro la
-    # tupla ntp_server_tuple hasta que obtengo la primer respuesta
-    if not timestamp:
-        for server in ntp_server_tuple:
-            try:
-                timestamp = client.request(server).tx_time
-            except (NTPException, gaierror):
-                timestamp = None
-            else:
-                # Se ejecuta si no hubo excepciones
-                break
+    if results is not None:
+        results.put(timestamp)
 
     return timestamp
 
 
+@lru_cache(maxsize=16)
+def resolve_host(hostname):
+    """
+    Devuelve la dirección IP del servidor de tiempo recibido o el nombre de
+    host si este no pudo ser resuelto
+    """
+    import socket
+
+    try:
+        return socket.getaddrinfo(
+            hostname, 'ntp', type=socket.SOCK_DGRAM)[0][4][0]
+    except (socket.gaierror, OSError):
+        return hostname
+
+
 def get_timezone(timestamp):
     """
     Devuelve el timezone respecto de UTC en formato (+-)hh:mm para el
     timestamp recibido
     """
-    # Convierto a localtime el timestamp recibido
-    current = datetime.fromtimestamp(timestamp)
+    # El desplazamiento respecto de UTC ya refleja si rige el horario de
+    # verano por lo que lo utilizo como clave de la caché
+    return format_offset(time.localtime(timestamp).tm_gmtoff)
 
-    # Convierto a UTC el timestamp recibido
-    utc = datetime.utcfromtimestamp(timestamp)
 
-    # Establezco el símbolo en '-' si utc > current ya que significa que UTC
-    # está "por delante" de la hora local mientras que si es <, UTC se
-    # encuentra "por detrás", es decir, la hora local es mayor
-    if utc > current:
-        timezone = '-'
-        seconds = (utc - current).seconds
-    else:
-        timezone = '+'
-        seconds = (current - utc).seconds
-
-    # Establezco los segundos en string h:mm y elimino los segundos
-    seconds = str(timedelta(seconds=seconds))[:-3]
-
-    # Si el largo es 4 entonces debo agregar el 0 por delante para obtener el
-    # timezone con formato hh:mm
-    if len(seconds) == 4:
-        timezone = timezone + '0' + seconds
-    else:
-        timezone = timezone + seconds
+@lru_cache(maxsize=8)
+def format_offset(offset):
+    """
+    Devuelve el desplazamiento en segundos respecto de UTC recibido en
+    formato (+-)hh:mm
+    """
+    # Establezco el símbolo en '-' si la hora local se encuentra "por detrás"
+    # de UTC y en '+' en caso contrario
+    sign = '+' if offset >= 0 else '-'
+    hours, seconds = divmod(abs(offset), 3600)
 
-    return timezone
+    return '{}{:02d}:{:02d}'.format(sign, hours, seconds // 60)
 
 
 def timestamp_to_datetime(timestamp, *, microsecond=0):
     """
     Devuelve una fecha datetime según el timestamp recibido
     """
+    # Trunco el timestamp a segundos para evitar crear un segundo objeto
+    # datetime al descartar los microsegundos
+    if microsecond == 0:
+        return datetime.fromtimestamp(int(timestamp))
+
     return datetime.fromtimestamp(timestamp).replace(microsecond=microsecond)
 
 
@@ -405,37 +559,90 @@ def datetime_to_string(datetime_obj):
     Convierte formato datetime.datetime a isoformat sin microsegundos
     """
     if isinstance(datetime_obj, datetime):
-        return datetime_obj.replace(microsecond=0).isoformat()
+        return datetime_obj.isoformat(timespec='seconds')
 
 
-def get_datetime(source='afip.time.gob.ar'):
+def get_datetime(source=NTP_SOURCE):
     """
     Devuelve la fecha en formato datetime según el servidor de tiempo (AFIP
     por default) o hace fallback a localtime si no se obtuvo un timestamp del
     servidor de tiempo
     """
-    # Obtengo el timestamp del servidor de tiempo de AFIP por default
+    # Obtengo el timestamp del servidor de tiempo de AFIP por default. ntp_time
+    # reutiliza el último timestamp obtenido según el reloj monotónico
     timestamp = ntp_time(source)
-    # Hago fallback a localtime
+
+    # Hago fallback a localtime convirtiendo directamente el timestamp local
     if not timestamp:
-        timestamp = datetime.now().timestamp()
+        return timestamp_to_datetime(time.time())
 
-    return timestamp_to_datetime(timestamp) if timestamp else None
+    return timestamp_to_datetime(timestamp)
 
 
 # Diccionarios
-def map_nested_dicts(data, function, data_type):
+def serialize_and_convert(data):
     """
-    Recorre un diccionario data y aplica function en objeto del tipo data_type
+    Serializa la respuesta de zeep a diccionarios y listas convirtiendo en la
+    misma pasada los objetos datetime a string
     """
-    for key, item in data.items():
-        if isinstance(item, collections.abc.Mapping):
-            map_nested_dicts(item, function, data_type)
+    mapping = collections.abc.Mapping
+
+    # Recorro la respuesta con una pila en lugar de recursión. Cada elemento
+    # de la pila es el objeto a convertir junto con el contenedor y la clave
+    # donde se almacena su resultado
+    result = [None]
+    stack = [(data, result, 0)]
+    while stack:
+        item, target, key = stack.pop()
+        # Los objetos compuestos de zeep exponen sus valores en __values__.
+        # Inicializo las claves para conservar su orden original
+        if hasattr(item, '__values__') or isinstance(item, mapping):
+            target[key] = node = dict.fromkeys(item)
+            stack.extend((item[name], node, name) for name in node)
         elif isinstance(item, list):
-            for value in item:
-                if isinstance(value, collections.abc.Mapping):
-                    map_nested_dicts(value, function, data_type)
-                elif isinstance(value, data_type):
-                    data[key] = function(value)
-        elif isinstance(item, data_type):
-            data[key] = function(item)
+            target[key] = node = [None] * len(item)
+            stack.extend((value, node, index)
+                         for index, value in enumerate(item))
+        elif isinstance(item, datetime):
+            target[key] = datetime_to_string(item)
+        else:
+            target[key] = item
+
+    return result[0]
+
+
+# DNS
+def get_hostnames():
+    """
+    Devuelve los nombres de host de los servidores de tiempo y de los WSDL
+    definidos en la configuración
+    """
+    # Obtengo los nombres de host de los WSDL de autenticación y de los Web
+    # Services a partir de las URL ya parseadas
+    hosts = [url.hostname for url in CONFIG_PARSED['wsdl'].values()]
+    for service, wsdl in CONFIG_PARSED['ws_wsdl'].items():
+        hosts.extend(get_wsdl_host(service, mode) for mode in wsdl)
+
+    # Elimino los nombres de host repetidos manteniendo el orden
+    hostnames = [NTP_SOURCE, *NTP_SERVERS, *hosts]
+
+    return tuple(dict.fromkeys(hostnames))
+
+
+def prefetch_dns(hostnames):
+    """
+    Resuelve los nombres de host recibidos para que la caché del resolver
+    del sistema operativo ya los contenga al momento de utilizarlos
+    """
+    import socket
+
+    for hostname in hostnames:
+        try:
+            socket.getaddrinfo(hostname, None, type=socket.SOCK_STREAM)
+        except (socket.gaierror, OSError):
+            pass
+
+
+# Resuelvo los nombres de host en segundo plano al importar el módulo
+threading.Thread(target=prefetch_dns, args=(get_hostnames(),),
+                 daemon=True).start()
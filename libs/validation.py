@@ -13,113 +13,263 @@
 Módulo con funciones auxiliares para la gestión de validación de input
 """
 
+import os
+import stat
+from functools import lru_cache
+
 __author__ = "Alejandro Naifuino <alenaifuino@gmail.com>"
 __copyright__ = "Copyright (C) 2017 Alejandro Naifuino"
 __license__ = "GPL 3.0"
 __version__ = "0.9.4"
 
+# Verificación en Base10
+CUIT_BASE = (5, 4, 3, 2, 7, 6, 5, 4, 3, 2)
+
+# Tabla de traducción que elimina los guiones de la CUIT
+NO_DASH = str.maketrans('', '', '-')
+
+# Código ASCII del dígito 0
+ZERO = ord('0')
+
+# Aporte del código ASCII del dígito 0 a la suma ponderada
+CUIT_OFFSET = ZERO * sum(CUIT_BASE)
 
+# Dígito verificador para cada suma ponderada posible (0 a 9 * 41)
+CUIT_CHECKER = bytes(9 if -total % 11 == 10 else -total % 11
+                     for total in range(9 * sum(CUIT_BASE) + 1))
+
+# Archivos validados indexados por (archivo, permiso, fecha de cambio)
+_FILE_CACHE = {}
+
+
+@lru_cache(maxsize=1024)
 def check_cuit(cuit):
     """
     Valida la Clave Unica de Identificación Tributaria (CUIT).
     Formato válido: xxyyyyyyyyz o xx-yyyyyyyy-z
     """
-    # Valido la longitud del cuit
+    # Valido la longitud del cuit eliminando los guiones sólo si estos se
+    # encuentran en las posiciones del formato xx-yyyyyyyy-z
     if not cuit:
         raise ValueError('La CUIT suministrada está vacía')
-    elif len(cuit) == 13:
-        cuit = cuit[:2] + cuit[3:11] + cuit[:-1]
-    elif len(cuit) != 11:
+    if len(cuit) == 13 and cuit[2] == cuit[11] == '-':
+        cuit = cuit.translate(NO_DASH)
+    if len(cuit) != 11:
         raise ValueError('La CUIT suministrada no es válida')
 
-    # Verificación en Base10
-    base = [5, 4, 3, 2, 7, 6, 5, 4, 3, 2]
+    # Obtengo los códigos ASCII de los dígitos reemplazando los caracteres no
+    # ASCII para que no sean considerados dígitos
+    digits = cuit.encode('ascii', 'replace')
+    if not digits.isdigit():
+        raise ValueError('La CUIT suministrada no es válida')
 
-    # Calculo el dígito verificador
-    list_sum = sum([int(cuit[i]) * base[i] for i in range(10)])
-    checker = 11 - (list_sum - ((list_sum // 11) * 11))
+    # Calculo la suma ponderada (pesos de CUIT_BASE) sobre los códigos ASCII
+    # sin recorrer un iterador y descuento el aporte del '0' de cada posición
+    list_sum = (digits[0] * 5 + digits[1] * 4 + digits[2] * 3 + digits[3] * 2 +
+                digits[4] * 7 + digits[5] * 6 + digits[6] * 5 + digits[7] * 4 +
+                digits[8] * 3 + digits[9] * 2) - CUIT_OFFSET
 
-    if checker == 11:
-        checker = 0
-    elif checker == 10:
-        checker = 9
+    # Obtengo el dígito verificador de la tabla precalculada
+    checker = CUIT_CHECKER[list_sum]
 
-    if not str(checker) == cuit[10]:
+    if checker != digits[10] - ZERO:
         raise ValueError('La CUIT suministrada no es válida')
 
     return True
 
 
+def check_cuits(cuits):
+    """
+    Valida una secuencia de CUIT y devuelve una lista con el resultado de la
+    validación de cada una
+    """
+    result = []
+    for cuit in cuits:
+        try:
+            result.append(check_cuit(cuit))
+        except ValueError:
+            result.append(False)
+
+    return result
+
+
 def check_file(file, permission='r'):
     """
     Valida que un archivo exista y que tenga los permisos requeridos
     """
+    # Uso la fecha de cambio de estado como parte de la clave para invalidar
+    # el resultado cacheado si el archivo o sus permisos cambiaron
     try:
-        open(file, permission)
+        status = os.stat(file)
     except FileNotFoundError:
         raise ValueError('No se encontró el archivo solicitado')
     except PermissionError:
         raise ValueError('El archivo no tiene los permisos requeridos')
+    key = (file, permission, status.st_ctime_ns)
+
+    if key in _FILE_CACHE:
+        return True
+
+    # Valido que la ruta no sea un directorio u otro tipo de archivo especial
+    if not stat.S_ISREG(status.st_mode):
+        raise ValueError('La ruta suministrada no es un archivo')
+
+    # Verifico los permisos sin abrir el archivo para no truncarlo cuando el
+    # permiso requerido es de escritura. Los modos con + requieren lectura y
+    # escritura
+    mode = os.W_OK if 'w' in permission or 'a' in permission else os.R_OK
+    if '+' in permission:
+        mode = os.R_OK | os.W_OK
+    if not os.access(file, mode):
+        raise ValueError('El archivo no tiene los permisos requeridos')
+
+    # Limito el tamaño de la caché
+    if len(_FILE_CACHE) > 256:
+        _FILE_CACHE.clear()
+    _FILE_CACHE[key] = True
 
     return True
 
 
+def check_config_file(key, value):
+    """
+    Valida que el archivo de configuración indicado en key exista y pueda ser
+    leído
+    """
+    try:
+        check_file(value)
+    except ValueError as error:
+        raise ValueError(f'Error de configuración en [{key}]: '
+                         f'{str(error).lower()}')
+
+
+def check_config_mode(key, value):
+    """
+    Valida que el modo de configuración indicado en key sea booleano
+    """
+    if not isinstance(value, bool):
+        raise ValueError(f'Error de configuración en [{key}]: el modo no es '
+                         'válido')
+
+
+# Pasos de validación de los datos de configuración que dependen de la
+# ejecución: certificado, clave privada y modos prod y debug
+CONFIG_STEPS = (
+    ('certificate', check_config_file),
+    ('private_key', check_config_file),
+    ('prod', check_config_mode),
+    ('debug', check_config_mode),
+)
+
+
 def check_config(data):
     """
-    Valida los datos de configuración
+    Valida los datos de configuración que dependen de la ejecución. Los
+    valores estáticos de CONFIG se validan al cargar config.config
     """
-    from urllib.parse import urlparse
+    for key, step in CONFIG_STEPS:
+        step(key, data[key])
 
-    # Valida el DN
-    if not isinstance(data['dn'], str):
-        raise ValueError('Error de configuración en [dn]: no es válido')
 
-    # Valida el certificado y la clave privada
-    for value in ['certificate', 'private_key']:
-        try:
-            check_file(data[value])
-        except ValueError as error:
-            raise ValueError('Error de configuración en [{}]: {}'.format(
-                value,
-                str(error).lower()))
+def check_cli_cuit(parser, value, name, choices):
+    """
+    Valida que el argumento de la línea de comandos sea una CUIT válida
+    """
+    try:
+        check_cuit(value)
+    except ValueError as error:
+        raise parser.error(error)
+
+
+def check_cli_file(parser, value, name, choices):
+    """
+    Valida que el argumento de la línea de comandos sea un archivo accesible
+    """
+    try:
+        check_file(value)
+    except ValueError as error:
+        raise parser.error(f'{name}: {error}')
+
+
+def check_cli_str(parser, value, name, choices):
+    """
+    Valida que el argumento de la línea de comandos sea una cadena de texto
+    """
+    if not isinstance(value, str):
+        raise parser.error(f'{name}: no es una cadena de texto')
+
+
+def check_cli_list(parser, value, name, choices):
+    """
+    Valida que el argumento de la línea de comandos sea un valor soportado
+    """
+    if value not in choices:
+        raise parser.error(f'{name}: no es un valor válido')
 
-    # Valida los WSDL
-    for value in ['wsdl', 'ws_wsdl']:
-        parsed = urlparse(data[value])
-        if not parsed.scheme or not parsed.netloc:
-            raise ValueError('Error de configuración en [{}]: no es una URL '
-                             'válida'.format(value))
 
-    # Valida el modo prod y debug
-    for value in ['prod', 'debug']:
-        if not isinstance(data[value], bool):
-            raise ValueError('Error de configuración en [{}]: el modo no es '
-                             'válido'.format(value))
+# Validaciones de los argumentos de la línea de comandos según su tipo
+CLI_CHECKS = {
+    'cuit': check_cli_cuit,
+    'file': check_cli_file,
+    'str': check_cli_str,
+    'list': check_cli_list,
+}
 
 
-def check_cli(parser, **kwargs):
+def check_cli(parser, arg_type, value, name=None, choices=None):
     """
     Wrapper que valida los valores de los argumentos de la línea de comandos
     """
     # Verifico los tipos de la línea de comandos
-    if kwargs['type'] == 'cuit':
-        try:
-            check_cuit(kwargs['value'])
-        except ValueError as error:
-            raise parser.error(error)
-    elif kwargs['type'] == 'file':
-        try:
-            check_file(kwargs['value'])
-        except ValueError as error:
-            raise parser.error(kwargs['name'] + ': ' + error)
-    elif kwargs['type'] == 'str':
-        if not isinstance(kwargs['value'], str):
-            raise parser.error(kwargs['name'] + ': no es una cadena de texto')
-    elif kwargs['type'] == 'list':
-        if kwargs['value'] not in kwargs['list']:
-            raise parser.error(kwargs['name'] + ': no es un valor válido')
+    handler = CLI_CHECKS.get(arg_type)
+    if handler:
+        handler(parser, value, name, choices)
+
+    return value
+
+
+# Comprobantes de wsfe.py que requieren indicar el tipo CAE o CAEA
+TYPED_VOUCHERS = frozenset(('solicitar', 'ultimo_autorizado',
+                            'cantidad_registros', 'consultar_comprobante'))
+
+
+def check_padron_parser(args, extra):
+    """
+    Valida las combinaciones de argumentos del script ws_sr_padron.py
+    """
+    # El alcance 100 requiere --tabla mientras que el resto requiere --persona
+    a100 = args.alcance == '100'
+    if a100 != bool(args.tabla):
+        raise ValueError('el agumento --tabla sólo es válido con '
+                         '--alcance 100')
+    elif a100 == bool(args.persona):
+        raise ValueError('el argumento --persona sólo es válido con '
+                         '--alcance 4, 5 o 10')
+
+
+def check_wsfe_parser(args, extra):
+    """
+    Valida las combinaciones de argumentos del script wsfe.py
+    """
+    if args.parametro == 'cotizacion':
+        if '--id' not in extra:
+            raise ValueError('debe indicar el ID de la moneda a '
+                             'cotizar: --id ID')
+        elif len(extra) != 2:
+            raise ValueError('debe indicar un único ID')
+    if args.comprobante in TYPED_VOUCHERS:
+        if '--tipo' not in extra:
+            raise ValueError('debe inficar el tipo de comprobante: '
+                             '--tipo CAE o CAEA')
+        elif len(extra) != 2:
+            raise ValueError('debe indicar un único tipo de comprobante')
+
 
-    return kwargs['value']
+# Validaciones de combinaciones de argumentos según el script
+PARSER_CHECKS = {
+    'ws_sr_padron.py': check_padron_parser,
+    'wsfe.py': check_wsfe_parser,
+}
 
 
 def check_parser(args, extra):
@@ -127,28 +277,8 @@ def check_parser(args, extra):
     Valida las combinaciones de argumentos que no pueden ser verificadas
     mediante argparse
     """
-    if args.prog == 'ws_sr_padron.py':
-        if args.scope == '100' and not args.table or \
-           args.scope != '100' and args.table:
-            raise ValueError('el agumento --tabla sólo es válido con '
-                             '--alcance 100')
-        elif args.scope == '100' and args.person or \
-             args.scope != '100' and not args.person:
-            raise ValueError('el argumento --persona sólo es válido con '
-                             '--alcance 4, 5 o 10')
-    elif args.prog == 'wsfe.py':
-        if args.parameter == 'cotizacion':
-            if '--id' not in extra:
-                raise ValueError('debe indicar el ID de la moneda a '
-                                 'cotizar: --id ID')
-            elif len(extra) != 2:
-                raise ValueError('debe indicar un único ID')
-        if args.voucher in ('solicitar', 'ultimo_autorizado',
-                            'cantidad_registros', 'consultar_comprobante'):
-            if '--tipo' not in extra:
-                raise ValueError('debe inficar el tipo de comprobante: '
-                                 '--tipo CAE o CAEA')
-            elif len(extra) != 2:
-                raise ValueError('debe indicar un único tipo de comprobante')
+    check = PARSER_CHECKS.get(args.prog)
+    if check:
+        check(args, extra)
 
     return True
@@ -14,23 +14,51 @@ Módulo con clases para la gestión de Web Services SOAP
 """
 
 import logging
+import os
+import ssl
+import time
 
-from requests import Session
-from zeep import Client, helpers
-from zeep.transports import Transport
+from config.config import OUTPUT_DIR, WSDL_CACHE
+from libs.utility import serialize_and_convert
 
 __author__ = 'Alejandro Naifuino (alenaifuino@gmail.com)'
 __copyright__ = 'Copyright (C) 2017 Alejandro Naifuino'
 __license__ = 'GPL 3.0'
 __version__ = '1.5.2'
 
+# Logger del módulo cuyo nivel depende del modo debug
+_LOGGER = logging.getLogger(__name__)
+
+# Sesión HTTP compartida entre los clientes SOAP
+_SESSION = None
+
+# Contextos SSL indexados por archivo de certificados de CA
+_SSL_CONTEXTS = {}
+
+# Caché persistente de WSDL y XSD compartida entre los clientes SOAP
+_CACHE = None
+
+# Clientes SOAP indexados por (wsdl, timeout)
+_CLIENTS = {}
+
+# Estado de los servidores de AFIP indexado por (wsdl, método) y su tiempo de
+# vida en segundos
+_DUMMY_CACHE = {}
+DUMMY_TTL = 60
+
+# Directorios de salida ya creados durante la ejecución
+_DIRS_CREATED = set()
+
 
 class WSBase():
     """
     Clase que se usa como base para los web services de acceso al
-    sistema SOAP de AFIP
+    sistema SOAP de AFIP. Define __slots__ por lo que las subclases deben
+    declarar los atributos que agreguen
     """
 
+    __slots__ = ('debug', 'ws_wsdl', 'web_service', 'token', 'sign', 'output')
+
     def __init__(self, debug, ws_wsdl, web_service):
         self.debug = debug
         self.ws_wsdl = ws_wsdl
@@ -39,66 +67,191 @@ class WSBase():
         self.sign = None
         self.output = None
 
-    def dummy(self, name='dummy'):
+        # Muestro el estado de los servidores sólo en modo debug
+        _LOGGER.setLevel(logging.INFO if debug else logging.WARNING)
+
+    def dummy(self, name='dummy', force=False):
         """
         Verifica estado y disponibilidad de los elementos principales del
-        servicio de AFIP: aplicación, autenticación y base de datos
+        servicio de AFIP: aplicación, autenticación y base de datos. El
+        resultado se reutiliza durante DUMMY_TTL segundos salvo que force sea
+        True
         """
-        # Obtengo la respuesta de AFIP
-        response = soap_connect(self.ws_wsdl, name)
+        # Devuelvo el estado cacheado si todavía está vigente
+        cache_key = (self.ws_wsdl, name)
+        cached = _DUMMY_CACHE.get(cache_key)
+        if not force and cached and time.monotonic() - cached[0] < DUMMY_TTL:
+            return cached[1]
 
-        # Armo un diccionario con el estado de cada componente
-        status = {key.lower(): value for (key, value) in response.items()}
+        # Obtengo la respuesta de AFIP sin serializar ya que sólo se leen los
+        # estados de cada componente
+        response = soap_connect(self.ws_wsdl, name, serialize=False)
 
         # Si estoy en modo debug imprimo el estado de los servidores
-        if self.debug:
-            logging.info('|===========  Servidores AFIP  ===========')
-            logging.info('| AppServer: ' + status['appserver'])
-            logging.info('| AuthServer: ' + status['authserver'])
-            logging.info('| DBServer: ' + status['dbserver'])
-            logging.info('|=================  ---  =================')
+        if _LOGGER.isEnabledFor(logging.INFO):
+            # Armo un diccionario con el estado de cada componente
+            status = {key.lower(): response[key] for key in response}
+
+            _LOGGER.info('|===========  Servidores AFIP  ===========')
+            _LOGGER.info('| AppServer: %s', status['appserver'])
+            _LOGGER.info('| AuthServer: %s', status['authserver'])
+            _LOGGER.info('| DBServer: %s', status['dbserver'])
+            _LOGGER.info('|=================  ---  =================')
 
         # Devuelvo True si alguno de los componentes no está disponible
-        for value in status.values():
-            if value != 'OK':
-                return True
+        down = any(response[item] != 'OK' for item in response)
+        _DUMMY_CACHE[cache_key] = (time.monotonic(), down)
 
-        return False
+        return down
 
     def set_output_path(self, output_file):
         """
         Devuelve el path y archivo donde se almacena la respuesta y crea los
         directorios si estos no existen
         """
-        import os
-
-        from config.config import OUTPUT_DIR
-
         # Defino el nombre del directorio de salida
         output_dir = OUTPUT_DIR + self.web_service + '/'
 
-        # Creo el directorio si este no existe
-        os.makedirs(os.path.dirname(output_dir), exist_ok=True)
+        # Creo el directorio si este no existe, sólo la primera vez que es
+        # solicitado
+        if output_dir not in _DIRS_CREATED:
+            os.makedirs(output_dir, exist_ok=True)
+            _DIRS_CREATED.add(output_dir)
 
         # Defino el archivo y ruta donde se guardará el ticket
         self.output = os.path.join(output_dir, output_file)
 
+    def write_output(self, data):
+        """
+        Guarda data en formato JSON en el archivo de salida. Escribe en un
+        archivo temporal que reemplaza atómicamente al de salida para no dejar
+        un archivo truncado si la serialización falla
+        """
+        import json
+
+        # Escribo el JSON directamente en el archivo sin armarlo antes en
+        # memoria y elimino el temporal si la serialización falla
+        temp = self.output + '.tmp'
+        try:
+            with open(temp, 'w', encoding='utf-8') as file:
+                json.dump(data, file, indent=2, ensure_ascii=False)
+        except Exception:
+            os.remove(temp)
+            raise
+
+        os.replace(temp, self.output)
 
-def soap_connect(wsdl, name, parameters=None, timeout=30):
+
+def ssl_adapter(ssl_context, **kwargs):
     """
-    Conecta al Web Service SOAP de AFIP requerido con los parámetros
-    suministrados
+    Devuelve un adaptador HTTP que establece todas las conexiones HTTPS con
+    el mismo contexto SSL
     """
-    # Instancio Session para validar la conexión SSL, de esta manera la
-    # información se mantiene de manera persistente
-    session = Session()
+    from requests.adapters import HTTPAdapter
+
+    class SSLAdapter(HTTPAdapter):
+        """
+        Adaptador HTTP con contexto SSL compartido
+        """
 
-    # Instancio Transport con la información de sesión y el timeout a
-    # utilizar en la conexión
-    transport = Transport(session=session, timeout=timeout)
+        def init_poolmanager(self, *args, **kwargs):
+            kwargs['ssl_context'] = ssl_context
+            return super().init_poolmanager(*args, **kwargs)
+
+        def cert_verify(self, conn, url, verify, cert):
+            super().cert_verify(conn, url, verify, cert)
+
+            # Los certificados de CA ya están cargados en el contexto SSL por
+            # lo que evito que se vuelvan a leer en cada conexión
+            if verify is True:
+                conn.ca_certs = None
+                conn.ca_cert_dir = None
+
+    return SSLAdapter(**kwargs)
+
+
+def get_ssl_context(cafile=None):
+    """
+    Devuelve el contexto SSL del archivo de certificados de CA suministrado
+    cargándolo sólo la primera vez que es solicitado. Por defecto utiliza los
+    certificados de requests
+    """
+    if cafile is None:
+        from requests.utils import DEFAULT_CA_BUNDLE_PATH as cafile
 
-    # Instancio Client con los datos del wsdl y de transporte
-    client = Client(wsdl=wsdl, transport=transport)
+    context = _SSL_CONTEXTS.get(cafile)
+    if context is None:
+        context = _SSL_CONTEXTS[cafile] = ssl.create_default_context(
+            cafile=cafile)
+
+    return context
+
+
+def get_session():
+    """
+    Devuelve la sesión HTTP compartida por todos los Web Services de manera
+    que las conexiones con AFIP se mantengan abiertas entre llamadas
+    """
+    global _SESSION
+    if _SESSION is None:
+        from requests import Session
+
+        _SESSION = Session()
+        _SESSION.mount('https://', ssl_adapter(get_ssl_context(),
+                                               pool_connections=10,
+                                               pool_maxsize=10))
+
+    return _SESSION
+
+
+def get_cache():
+    """
+    Devuelve la caché persistente de WSDL y XSD de manera que los esquemas no
+    se descarguen y parseen en cada ejecución
+    """
+    global _CACHE
+    if _CACHE is None:
+        from zeep.cache import SqliteCache
+
+        # Creo el directorio de la caché si este no existe
+        path = os.path.expanduser(WSDL_CACHE['path'])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        _CACHE = SqliteCache(path=path, timeout=WSDL_CACHE['timeout'])
+
+    return _CACHE
+
+
+def get_client(wsdl, timeout=30):
+    """
+    Devuelve el cliente SOAP del WSDL suministrado creándolo sólo la primera
+    vez que es solicitado
+    """
+    client = _CLIENTS.get((wsdl, timeout))
+    if client is None:
+        from zeep import Client
+        from zeep.transports import Transport
+
+        # Instancio Transport con la sesión y la caché compartidas y el
+        # timeout a utilizar en la conexión
+        transport = Transport(
+            session=get_session(), timeout=timeout, cache=get_cache())
+
+        # Instancio Client con los datos del wsdl y de transporte
+        client = _CLIENTS[(wsdl, timeout)] = Client(wsdl=wsdl,
+                                                    transport=transport)
+
+    return client
+
+
+def soap_connect(wsdl, name, parameters=None, timeout=30, serialize=True):
+    """
+    Conecta al Web Service SOAP de AFIP requerido con los parámetros
+    suministrados. Si serialize es False devuelve el objeto zeep sin
+    convertirlo a diccionarios, listas y fechas en string
+    """
+    # Obtengo el cliente del wsdl reutilizando la sesión y el WSDL parseado
+    client = get_client(wsdl, timeout)
 
     # Obtengo la respuesta de AFIP según el tipo de método y los parámetros
     # suministrados
@@ -107,5 +260,10 @@ def soap_connect(wsdl, name, parameters=None, timeout=30):
     else:
         response = getattr(client.service, name)(**parameters)
 
-    # Serializo y devuelvo la respuesta de AFIP
-    return helpers.serialize_object(response)
+    # Devuelvo la respuesta de AFIP sin recorrer el árbol de objetos
+    if not serialize:
+        return response
+
+    # Serializo y devuelvo la respuesta de AFIP con las fechas convertidas a
+    # string en una única pasada
+    return serialize_and_convert(response)
@@ -38,11 +38,7 @@ WS_SR_PADRON_A100 - Especificación Técnica v1.1 en:
 http://www.afip.gov.ar/ws/ws_sr_padron_a100/manual_ws_sr_padron_a100_v1.1.pdf
 """
 
-from datetime import datetime
-from json import dumps
-
 from libs import utility, web_service
-from wsaa import WSAA
 
 __author__ = 'Alejandro Naifuino (alenaifuino@gmail.com)'
 __copyright__ = 'Copyright (C) 2017 Alejandro Naifuino'
@@ -59,6 +55,8 @@ class WSSRPADRON(web_service.WSBase):
         - Alcance 100
     """
 
+    __slots__ = ('cuit', 'scope', 'option')
+
     def __init__(self, config):
         super().__init__(config['debug'], config['ws_wsdl'],
                          config['web_service'])
@@ -70,11 +68,9 @@ class WSSRPADRON(web_service.WSBase):
         """
         Método genérico que obtiene el método solicitado en option
         """
-        from zeep import exceptions
+        from concurrent.futures import ThreadPoolExecutor
 
-        # Valido que el servicio de AFIP esté funcionando
-        if self.dummy():
-            raise SystemExit('El servicio de AFIP no se encuentra disponible')
+        from zeep import exceptions
 
         # Establezco el lugar donde se almacenan los datos
         self.set_output_path(output_file=self.option + '.json')
@@ -94,25 +90,34 @@ class WSSRPADRON(web_service.WSBase):
             method = 'getPersona'
             params.update({'idPersona': self.option})
 
-        # Obtengo la respuesta del WSDL de AFIP
-        try:
-            response = web_service.soap_connect(self.ws_wsdl, method, params)
-        except exceptions.Fault as error:
-            raise SystemExit('Error: {} {}'.format(error.code, error.message))
-
-        # Recorro el diccionario de respuesta y convierto los items del tipo
-        # datetime a string
-        utility.map_nested_dicts(response, utility.datetime_to_string,
-                                 datetime)
-
-        # Lo transformo a JSON
-        json_response = dumps(response, indent=2, ensure_ascii=False)
+        # Creo el cliente SOAP antes de consultar en paralelo para que ambas
+        # consultas lo compartan
+        web_service.get_client(self.ws_wsdl)
+
+        # Verifico el estado del servicio y obtengo la respuesta del WSDL de
+        # AFIP en paralelo
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            status = executor.submit(self.dummy)
+            request = executor.submit(web_service.soap_connect, self.ws_wsdl,
+                                      method, params)
+
+            # Valido que el servicio de AFIP esté funcionando y descarto la
+            # respuesta en caso contrario. La consulta ya está en curso por lo
+            # que al salir del bloque se espera a que finalice
+            if status.result():
+                raise SystemExit('El servicio de AFIP no se encuentra '
+                                 'disponible')
+
+            try:
+                response = request.result()
+            except exceptions.Fault as error:
+                raise SystemExit('Error: {} {}'.format(error.code,
+                                                       error.message))
 
         # Genero el archivo con la respuesta de AFIP
-        with open(self.output, 'w') as _:
-            _.write(json_response)
+        self.write_output(response)
 
-        return json_response
+        return response
 
 
 def main():
@@ -135,7 +140,10 @@ def main():
     if config_data['debug']:
         utility.print_config(config_data)
 
-    # Instancio WSAA para obtener un objeto de autenticación y autorización
+    # Instancio WSAA para obtener un objeto de autenticación y autorización,
+    # importándolo recién una vez validados los argumentos
+    from wsaa import WSAA
+
     wsaa = WSAA(config_data)
 
     # Instancio WSSRPADRON para obtener un objeto de padrón AFIP
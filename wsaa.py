@@ -30,6 +30,7 @@ http://www.afip.gov.ar/ws/WSAA/Especificacion_Tecnica_WSAA_1.2.2.pdf
 # pyafipws - Sistemas Agiles - versión 2.11c 2017-03-14
 
 import logging
+import os
 from datetime import timedelta
 
 from lxml import builder, etree
@@ -48,6 +49,9 @@ class WSAA(web_service.WSBase):
     y Autorización de AFIP
     """
 
+    __slots__ = ('prod', 'sdn', 'certificate', 'private_key', 'wsdl',
+                 'expiration_time')
+
     def __init__(self, conf):
         super().__init__(conf['debug'], conf['ws_wsdl'], conf['web_service'])
         self.prod = conf['prod']
@@ -175,9 +179,12 @@ class WSAA(web_service.WSBase):
         # XML de respuesta
         response = web_service.soap_connect(self.wsdl, 'loginCms', params)
 
-        # Genero el archivo con la respuesta de AFIP
-        with open(self.output, 'w') as _:
+        # Genero el archivo con la respuesta de AFIP en un archivo temporal y
+        # lo reemplazo atómicamente para no dejar un ticket truncado en disco
+        temp = self.output + '.tmp'
+        with open(temp, 'w') as _:
             _.write(response)
+        os.replace(temp, self.output)
 
         # Parseo los elementos de la respuestsa XML de AFIP
         self.__parse_login_response(response)
@@ -60,12 +60,7 @@ Especificación Técnica v2.10 en:
 http://www.afip.gob.ar/fe/documentos/manual_desarrollador_COMPG_v2_10.pdf
 """
 
-from json import dumps
-
-from zeep import exceptions
-
-from libs import utility, web_service
-from wsaa import WSAA
+from libs import utility, validation, web_service
 
 __author__ = 'Alejandro Naifuino (alenaifuino@gmail.com)'
 __copyright__ = 'Copyright (C) 2017 Alejandro Naifuino'
@@ -79,6 +74,8 @@ class WSFE(web_service.WSBase):
     de AFIP
     """
 
+    __slots__ = ('cuit', 'request', 'option', 'currency_id', 'voucher_type')
+
     def __init__(self, config):
         super().__init__(config['debug'], config['ws_wsdl'],
                          config['web_service'])
@@ -92,8 +89,7 @@ class WSFE(web_service.WSBase):
 
         # Establezco el tipo de comprobante dependiendo del método seleccionado
         if self.request == 'comprobante':
-            if self.option in ('solicitar', 'ultimo_autorizado',
-                               'cantidad_registros', 'consultar_comprobante'):
+            if self.option in validation.TYPED_VOUCHERS:
                 self.voucher_type = config['tipo']
 
     def __request_param(self):
@@ -101,6 +97,8 @@ class WSFE(web_service.WSBase):
         Método genérico que realiza la solicitud a los métodos de AFIP que
         devuelven parámetros
         """
+        from zeep import exceptions
+
         # Métodos soportados por el web service de Factura Electrónica
         methods = {
             'comprobante': 'FEParamGetTiposCbte',
@@ -144,19 +142,17 @@ class WSFE(web_service.WSBase):
         except exceptions.Fault as error:
             raise SystemExit('Error: {} {}'.format(error.code, error.message))
 
-        # Lo transformo a JSON
-        json_response = dumps(response, indent=2, ensure_ascii=False)
-
         # Genero el archivo con la respuesta de AFIP
-        with open(self.output, 'w') as file:
-            file.write(json_response)
+        self.write_output(response)
 
-        return json_response
+        return response
 
     def __request_fe(self):
         """
         Método genérico que realiza la solicitud según el req_type definido
         """
+        from zeep import exceptions
+
         # Métodos soportados por el web service de Factura Electrónica
         methods = {
             'solicitar': '',
@@ -379,7 +375,10 @@ def main():
     if config_data['debug']:
         utility.print_config(config_data)
 
-    # Instancio WSAA para obtener un objeto de autenticación y autorización
+    # Instancio WSAA para obtener un objeto de autenticación y autorización,
+    # importándolo recién una vez validados los argumentos
+    from wsaa import WSAA
+
     wsaa = WSAA(config_data)
 
     # Instancio WSFE para obtener un objeto de Factura Electrónica AFIP